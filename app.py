@@ -1,6 +1,7 @@
 from flask import Flask, render_template, jsonify, request, send_file
 import cv2
 import threading
+import time
 import base64
 from io import BytesIO
 import os
@@ -8,6 +9,8 @@ import glob
 import json
 from datetime import datetime
 from backend.detector import DrowsinessDetector
+from backend.capture import CameraCapture, CAPTURE_FORMATS
+from backend.events import AlertEvent, EventBus, NDJSONSink, WebhookSink, DashboardSink
 
 app = Flask(__name__)
 
@@ -33,6 +36,13 @@ current_session = None
 metrics_history = []
 alert_count = 0
 
+# Alert event bus (rebuilt per detection run so settings changes apply).
+# The dashboard buffer and the NDJSON log outlive a single bus, so a bus
+# still flushing in the background never competes with its successor.
+event_bus = None
+dashboard_events = DashboardSink()
+event_log = None
+
 # Driver profiles
 driver_profiles = {
     "default": {
@@ -55,7 +65,12 @@ app_settings = {
     "notifications": True,
     "auto_export": False,
     "sound_alerts": True,
-    "alert_volume": 70
+    "alert_volume": 70,
+    "webhook_url": "",
+    "capture_mode": "low_latency",  # low_latency, standard
+    "capture_format": "MJPG",  # MJPG, YUYV
+    "analysis_width": 640,
+    "stream_full_resolution": False  # low_latency only: stream 1280x720 instead of the analysis frame
 }
 
 # ====== ROUTE: HOME PAGE ======
@@ -101,17 +116,32 @@ def about():
 # ====== API: START DETECTION ======
 @app.route('/api/start-detection', methods=['POST'])
 def start_detection():
-    global detector, cap, is_running, current_session, metrics_history, alert_count
+    global detector, cap, is_running, current_session, metrics_history, alert_count, event_bus
     try:
         detector = DrowsinessDetector()
-        cap = cv2.VideoCapture(0)
+        
+        if app_settings.get("capture_mode") == "low_latency":
+            # Negotiated format, 1-frame buffer, low-res analysis frames;
+            # full resolution is decoded only for screenshots
+            fmt, analysis_width = capture_options()
+            cap = CameraCapture(
+                0,
+                width=1280,
+                height=720,
+                formats=(fmt,) + tuple(f for f in CAPTURE_FORMATS if f != fmt),
+                analysis_width=analysis_width
+            )
+        else:
+            cap = cv2.VideoCapture(0)
         
         if not cap.isOpened():
+            cap.release()
             return jsonify({"error": "Could not open webcam"}), 500
         
-        # Apply camera settings
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        if not isinstance(cap, CameraCapture):
+            # Apply camera settings
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
         
         # Run calibration
         detector.run_calibration(cap, duration=5)
@@ -134,14 +164,38 @@ def start_detection():
         
         metrics_history = []
         
+        if event_bus:
+            event_bus.stop(timeout=1.0)
+        event_bus = build_event_bus()
+        
         # Start detection thread
         threading.Thread(target=detection_loop, daemon=True).start()
         
-        return jsonify({"status": "Detection started", "session_id": current_session["id"]}), 200
+        return jsonify({
+            "status": "Detection started",
+            "session_id": current_session["id"],
+            "event_seq": dashboard_events.latest_seq()
+        }), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def capture_options():
+    # Settings arrive unchecked from /api/settings; fall back to defaults
+    # rather than failing start_detection on a bad value
+    fmt = str(app_settings.get("capture_format", "MJPG")).upper()
+    if fmt not in CAPTURE_FORMATS:
+        print(f"⚠️ Unsupported capture_format {fmt!r}, using MJPG")
+        fmt = "MJPG"
+    try:
+        analysis_width = int(app_settings.get("analysis_width", 640))
+    except (TypeError, ValueError):
+        analysis_width = 0
+    if analysis_width <= 0:
+        print(f"⚠️ Invalid analysis_width {app_settings.get('analysis_width')!r}, using 640")
+        analysis_width = 640
+    return fmt, analysis_width
+
 # ====== API: STOP DETECTION ======
 @app.route('/api/stop-detection', methods=['POST'])
 def stop_detection():
@@ -152,6 +206,11 @@ def stop_detection():
     if cap:
         cap.release()
     
+    # Closes the bus to new events first, then gives all sinks one shared
+    # second to flush so a dead webhook can't hold up this request
+    if event_bus:
+        event_bus.stop(timeout=1.0)
+    
     # Save session
     if current_session:
         current_session["end_time"] = datetime.now().isoformat()
@@ -180,20 +239,39 @@ def get_frame_b64():
         if current_frame is None:
             return jsonify({"error": "No frame available"}), 404
         
-        ret, jpeg = cv2.imencode('.jpg', current_frame)
-        b64_img = base64.b64encode(jpeg.tobytes()).decode('utf-8')
-        return jsonify({"frame": b64_img})
+        return jsonify({"frame": encode_frame_b64(current_frame)})
+
+def encode_frame_b64(frame):
+    ret, jpeg = cv2.imencode('.jpg', frame)
+    return base64.b64encode(jpeg.tobytes()).decode('utf-8')
 
 # ====== API: GET METRICS ======
 @app.route('/api/metrics')
 def api_metrics():
     return jsonify(latest_metrics)
 
+# ====== API: GET CAPTURE STATS ======
+@app.route('/api/capture')
+def api_capture():
+    if isinstance(cap, CameraCapture):
+        return jsonify({"mode": "low_latency", **cap.stats()})
+    return jsonify({"mode": "standard" if cap else None})
+
 # ====== API: GET METRICS HISTORY ======
 @app.route('/api/metrics-history')
 def api_metrics_history():
     return jsonify({"history": metrics_history[-500:]})  # Last 500 readings
 
+# ====== API: GET ALERT EVENTS ======
+@app.route('/api/events')
+def api_events():
+    since = request.args.get('since', 0, type=int)
+    return jsonify({
+        "events": dashboard_events.since(since),
+        "latest_seq": dashboard_events.latest_seq(),
+        "bus": event_bus.stats() if event_bus else None
+    })
+
 # ====== API: GET SESSIONS ======
 @app.route('/api/sessions')
 def api_sessions():
@@ -344,7 +422,10 @@ def clear_all():
 
 # ====== DETECTION LOOP ======
 def detection_loop():
-    global detector, cap, is_running, current_frame, latest_metrics, current_session, metrics_history, alert_count
+    global detector, cap, is_running, current_frame
+    # fatigue_alert repeats on every frame while fatigue stays high; only the
+    # first frame of each episode is published to the event bus
+    fatigue_episode = False
     
     while is_running and cap:
         ret, frame = cap.read()
@@ -353,48 +434,92 @@ def detection_loop():
             continue
         
         try:
-            # Analyze frame
-            status, color, ear, mar, fatigue, gaze_ratio, alert_triggered, event_type = detector.analyze_frame(frame)
-            frame_with_hud = detector.draw_hud(frame, status, color, ear, mar, fatigue, gaze_ratio)
+            # Analyze frame (screenshots use the full-resolution frame when the capture keeps one)
+            status, color, ear, mar, fatigue, gaze_ratio, alert_triggered, event_type = detector.analyze_frame(
+                frame, evidence=getattr(cap, "full_frame", None)
+            )
+            # The low-latency capture analyses a reduced frame; decode the
+            # full frame for the dashboard stream only when asked to
+            display_frame = frame
+            if app_settings.get("stream_full_resolution") and hasattr(cap, "full_frame"):
+                full = cap.full_frame()
+                if full is not None:
+                    display_frame = full
+            frame_with_hud = detector.draw_hud(display_frame, status, color, ear, mar, fatigue, gaze_ratio)
+            
+            # Glass-to-decision latency, when the capture timestamps its grabs
+            if getattr(cap, "frame_time", None):
+                latest_metrics["latency_ms"] = round((time.time() - cap.frame_time) * 1000, 1)
             
             with frame_lock:
                 current_frame = frame_with_hud
             
-            # Update live metrics
-            latest_metrics["ear"] = round(ear, 2)
-            latest_metrics["mar"] = round(mar, 2)
-            latest_metrics["gaze"] = round(gaze_ratio or 0, 2)
-            latest_metrics["fatigue"] = fatigue
-            latest_metrics["status"] = status
-            
-            # Store in history
-            metrics_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "ear": round(ear, 2),
-                "mar": round(mar, 2),
-                "gaze": round(gaze_ratio or 0, 2),
-                "fatigue": fatigue,
-                "status": status
-            })
-            
-            # Update session stats
-            if current_session:
-                current_session["total_fatigue"] += fatigue
-                current_session["frames_count"] += 1
-                current_session["peak_fatigue"] = max(current_session.get("peak_fatigue", 0), fatigue)
-                
-                if alert_triggered:
-                    current_session["alerts"] += 1
-                    alert_count += 1
-                    print(f"🚨 ALERT #{alert_count}: {event_type} - {status}")
+            record_metrics(status, ear, mar, fatigue, gaze_ratio, alert_triggered, event_type)
             
             # Handle alerts
+            repeated = event_type == "fatigue_alert" and fatigue_episode
+            fatigue_episode = fatigue >= detector.alert_lvl
             if alert_triggered:
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] ALERT: {event_type} - Fatigue: {fatigue}/10")
+                if event_bus and not repeated:
+                    event_bus.publish(AlertEvent(
+                        event_type,
+                        fatigue,
+                        metrics={"ear": round(ear, 2), "mar": round(mar, 2), "gaze": round(gaze_ratio or 0, 2)},
+                        screenshot=detector.last_screenshot,
+                        session_id=current_session["id"] if current_session else None,
+                        driver_id=current_driver
+                    ))
         
         except Exception as e:
             print(f"Error in detection loop: {e}")
 
+# ====== METRICS BOOKKEEPING ======
+def record_metrics(status, ear, mar, fatigue, gaze_ratio, alert_triggered, event_type):
+    global current_session, metrics_history, alert_count
+    
+    # Update live metrics
+    latest_metrics["ear"] = round(ear, 2)
+    latest_metrics["mar"] = round(mar, 2)
+    latest_metrics["gaze"] = round(gaze_ratio or 0, 2)
+    latest_metrics["fatigue"] = fatigue
+    latest_metrics["status"] = status
+    
+    # Store in history
+    metrics_history.append({
+        "timestamp": datetime.now().isoformat(),
+        "ear": round(ear, 2),
+        "mar": round(mar, 2),
+        "gaze": round(gaze_ratio or 0, 2),
+        "fatigue": fatigue,
+        "status": status
+    })
+    
+    # Update session stats
+    if current_session:
+        current_session["total_fatigue"] += fatigue
+        current_session["frames_count"] += 1
+        current_session["peak_fatigue"] = max(current_session.get("peak_fatigue", 0), fatigue)
+        
+        if alert_triggered:
+            current_session["alerts"] += 1
+            alert_count += 1
+            print(f"🚨 ALERT #{alert_count}: {event_type} - {status}")
+
+# ====== EVENT BUS ======
+def build_event_bus():
+    global event_log
+    if event_log is None:
+        event_log = NDJSONSink('data/events.ndjson')
+    bus = EventBus()
+    bus.add_sink(event_log)
+    bus.add_sink(dashboard_events, flush_interval=0.25)
+    if app_settings.get("webhook_url"):
+        # Webhooks can be slow or down: keep a deeper queue and drop the
+        # oldest events rather than stall, retrying each batch a few times
+        bus.add_sink(WebhookSink(app_settings["webhook_url"]), max_queue=5000, max_retries=5)
+    return bus.start()
+
 # ====== FILE OPERATIONS ======
 def save_sessions():
     os.makedirs('data', exist_ok=True)
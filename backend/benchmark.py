@@ -0,0 +1,471 @@
+"""Benchmark suite for the detection hot path.
+
+Times each stage of per-frame processing on its own and end to end, using
+synthetic frames and landmark fixtures so no camera is needed. Results are
+written as JSON and can be compared against a saved baseline.
+
+    python -m backend.benchmark --output bench.json
+    python -m backend.benchmark --compare bench.json --tolerance 15 --budget-ms 33
+    python -m backend.benchmark --record drive.mp4 --landmarks drive_landmarks.json
+    python -m backend.benchmark --landmarks drive_landmarks.json --video drive.mp4
+
+Stages:
+    capture_decode  MJPG buffer to analysis frame, as CameraCapture.read() does
+    face_mesh       MediaPipe FaceMesh inference on one frame
+    features        EAR / MAR / gaze / eye-on-camera from landmarks
+    state_machine   analyze_frame() replaying the fixture on a simulated 30 fps
+                    clock, so timed alerts and screenshots fire
+    hud             draw_hud() on a full-resolution frame
+    encode          JPEG + base64 encoding as served by /api/frame-b64
+    metrics         record_metrics() bookkeeping for one frame
+    end_to_end      one detection_loop iteration: analyze_frame + draw_hud +
+                    record_metrics + encode. In low_latency capture mode (the
+                    app default) it starts from an MJPG buffer decoded to the
+                    analysis width, as CameraCapture delivers it; --capture-mode
+                    standard times the full-resolution path instead
+
+Synthetic frames contain no detectable face, so face_mesh and end_to_end
+only take the no-face path unless --video is given.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+FIXTURE_FPS = 30
+STAGES = ("capture_decode", "face_mesh", "features", "state_machine", "hud", "encode", "metrics", "end_to_end")
+NUM_LANDMARKS = 478
+
+
+# ====== LANDMARK FIXTURES ======
+class Landmark:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+def _eye_points(cx, cy, width, openness):
+    # Order matches DrowsinessDetector.LEFT_EYE / RIGHT_EYE: corner, top, top,
+    # corner, bottom, bottom -> EAR == 2 * openness / width
+    return [
+        (cx - width / 2, cy), (cx - width / 6, cy - openness), (cx + width / 6, cy - openness),
+        (cx + width / 2, cy), (cx + width / 6, cy + openness), (cx - width / 6, cy + openness),
+    ]
+
+
+def synthetic_landmarks(n_frames=300, seed=0):
+    """Scripted 10 s landmark sequence at FIXTURE_FPS: open eyes with blinks,
+    a 4.3 s look-away, a 1.2 s yawn and a 1.5 s eye closure. Each segment
+    outlasts its alert threshold in analyze_frame, so replaying one cycle on
+    the simulated clock fires the distraction, yawn and eyes_closed alerts.
+    The first 30 frames look ahead and serve as calibration."""
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0.5, 0.08, (NUM_LANDMARKS, 3))
+    frames = []
+    for i in range(n_frames):
+        phase = i % 300
+        eye_open = 0.009                      # EAR ~0.30
+        if phase % 90 < 4 or 205 <= phase < 250:
+            eye_open = 0.002                  # blink / closure, EAR ~0.07
+        mouth_open = 0.03 if 165 <= phase < 200 else 0.005
+        shift = 0.09 if 30 <= phase < 160 else 0.0
+        jitter = rng.normal(0, 0.001, 2)
+
+        pts = base.copy()
+        pts[:, :2] += jitter
+        for idx, (x, y) in zip([33, 160, 158, 133, 153, 144],
+                               _eye_points(0.42 + jitter[0], 0.42 + jitter[1], 0.06, eye_open)):
+            pts[idx, :2] = (x, y)
+        for idx, (x, y) in zip([362, 385, 387, 263, 373, 380],
+                               _eye_points(0.58 + jitter[0], 0.42 + jitter[1], 0.06, eye_open)):
+            pts[idx, :2] = (x, y)
+        for center, ring in ((0.42, range(468, 473)), (0.58, range(473, 478))):
+            for k, idx in enumerate(ring):
+                angle = k * math.pi / 2
+                r = 0.0 if k == 0 else 0.006
+                pts[idx, :2] = (center + shift + jitter[0] + r * math.cos(angle),
+                                0.42 + jitter[1] + r * math.sin(angle))
+        pts[13, :2] = (0.5, 0.62 - mouth_open)
+        pts[14, :2] = (0.5, 0.62 + mouth_open)
+        pts[78, :2] = (0.45, 0.62)
+        pts[308, :2] = (0.55, 0.62)
+        frames.append([Landmark(*p) for p in pts.tolist()])
+    return frames
+
+
+def load_landmarks(path):
+    with open(path) as f:
+        data = json.load(f)
+    return [[Landmark(*p) for p in frame] if frame else None for frame in data["frames"]]
+
+
+def record_landmarks(video_path, out_path, max_frames=600):
+    """Run FaceMesh over a video and save the landmarks as a JSON fixture."""
+    from backend.detector import DrowsinessDetector
+
+    detector = DrowsinessDetector()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video file: {video_path}")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        results = detector.facemesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if results.multi_face_landmarks:
+            lm = results.multi_face_landmarks[0].landmark
+            frames.append([[round(p.x, 6), round(p.y, 6), round(p.z, 6)] for p in lm])
+        else:
+            frames.append(None)
+    cap.release()
+    with open(out_path, "w") as f:
+        json.dump({"source": os.path.basename(video_path), "frames": frames}, f)
+    print(f"💾 Recorded {len(frames)} frames of landmarks to {out_path}")
+
+
+class FakeClock:
+    """Stands in for the time module inside backend.detector."""
+
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ReplayFaceMesh:
+    """Stands in for FaceMesh, returning fixture landmarks in order."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+
+    def process(self, rgb_frame):
+        lm = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.frames)
+        faces = [SimpleNamespace(landmark=lm)] if lm else None
+        return SimpleNamespace(multi_face_landmarks=faces)
+
+
+# ====== FRAMES ======
+def load_frames(video_path=None, width=1280, height=720, count=60):
+    if video_path is None:
+        from backend.loadtest import SyntheticCapture
+        return SyntheticCapture(width, height, pool_size=count).frames
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (width, height)) if frame.shape[:2] != (height, width) else frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"Could not read frames from {video_path}")
+    return frames
+
+
+# ====== TIMING ======
+def time_stage(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    cpu_start = time.process_time_ns()
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    cpu_total = time.process_time_ns() - cpu_start
+    samples_ms = sorted(s / 1e6 for s in samples)
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(samples_ms), 4),
+        "median_ms": round(statistics.median(samples_ms), 4),
+        "p95_ms": round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 4),
+        "min_ms": round(samples_ms[0], 4),
+        "max_ms": round(samples_ms[-1], 4),
+        "stdev_ms": round(statistics.stdev(samples_ms), 4) if len(samples_ms) > 1 else 0.0,
+        # Process CPU time includes MediaPipe / OpenCV worker threads
+        "cpu_ms": round(cpu_total / 1e6 / iterations, 4),
+    }
+
+
+def _cycle(items):
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"]]
+        state["i"] = (state["i"] + 1) % len(items)
+        return item
+    return next_item
+
+
+# ====== STAGES ======
+def _make_detector(landmarks, ss_dir):
+    from backend.detector import DrowsinessDetector
+
+    detector = DrowsinessDetector()
+    detector.ss_dir = ss_dir
+    # Calibrate on the first 30 fixture frames the way run_calibration()
+    # does, so replay takes the same branches as a calibrated session
+    faces = [lm for lm in landmarks[:30] if lm]
+    if faces:
+        iris = detector.LEFT_IRIS + detector.RIGHT_IRIS
+        detector.reference_eye_center = np.mean(
+            [(np.mean([lm[i].x for i in iris]), np.mean([lm[i].y for i in iris])) for lm in faces], axis=0)
+        gaze_ratios = [g for g in (detector.get_gaze_ratio(lm) for lm in faces) if g is not None]
+        if gaze_ratios:
+            detector.reference_gaze_ratio = np.mean(gaze_ratios)
+        detector.ear_thresh = np.mean([(detector.get_ear(lm, detector.LEFT_EYE) +
+                                        detector.get_ear(lm, detector.RIGHT_EYE)) / 2.0 for lm in faces]) * 0.85
+        detector.mar_thresh = np.mean([detector.get_mar(lm) for lm in faces]) + 0.08
+    detector.calibrated = True
+    return detector
+
+
+def build_stages(frames, landmarks, ss_dir, capture_mode="low_latency"):
+    import app as sentinel
+    import backend.detector as detector_module
+    from backend.capture import decode_analysis
+
+    stages = {}
+    alerts = {}
+    face_landmarks = [lm for lm in landmarks if lm] or synthetic_landmarks(30)
+    real = _make_detector(landmarks, ss_dir)
+    replay = _make_detector(landmarks, ss_dir)
+    replay.facemesh = ReplayFaceMesh(landmarks)
+
+    next_frame = _cycle(frames)
+    next_rgb = _cycle([cv2.cvtColor(f, cv2.COLOR_BGR2RGB) for f in frames])
+    next_lm = _cycle(face_landmarks)
+    # The state machine only reads pixels for cvtColor and screenshots, so a
+    # tiny frame keeps the stage about landmark logic, not pixel work
+    small = cv2.resize(frames[0], (64, 36))
+
+    def reset_metrics():
+        sentinel.metrics_history = []
+        sentinel.current_session = {"id": "bench", "alerts": 0, "total_fatigue": 0,
+                                    "frames_count": 0, "peak_fatigue": 0}
+
+    # Replay at the fixture's frame rate, not benchmark speed; otherwise the
+    # 1-4 s alert timers never expire and only the steady-state path is timed
+    clock = FakeClock()
+
+    def state_machine():
+        detector_module.time = clock
+        try:
+            result = replay.analyze_frame(small)
+        finally:
+            detector_module.time = time
+        clock.advance(1.0 / FIXTURE_FPS)
+        if result[6]:
+            alerts[result[7]] = alerts.get(result[7], 0) + 1
+
+    def features():
+        lm = next_lm()
+        real.get_ear(lm, real.LEFT_EYE)
+        real.get_ear(lm, real.RIGHT_EYE)
+        real.get_mar(lm)
+        real.get_gaze_ratio(lm)
+        real.is_eye_on_camera(lm)
+
+    def hud():
+        frame = next_frame()
+        real.draw_hud(frame, "WARNING: Drowsy", (0, 255, 255), 0.27, 0.12, 5, 0.48)
+
+    jpeg = cv2.imencode('.jpg', frames[0])[1]
+    full_width = frames[0].shape[1]
+    _, analysis_width = sentinel.capture_options()
+    next_buffer = _cycle([cv2.imencode('.jpg', f)[1] for f in frames])
+    hud_frame = real.draw_hud(frames[0], "AWAKE", (0, 255, 0), 0.3, 0.1, 2, 0.5)
+
+    def metrics():
+        if len(sentinel.metrics_history) > 10000:
+            reset_metrics()
+        sentinel.record_metrics("AWAKE", 0.3012, 0.1034, 2, 0.4987, False, None)
+
+    def end_to_end():
+        if capture_mode == "low_latency":
+            # Mirrors detection_loop on a CameraCapture: analyse the reduced
+            # frame and decode full resolution only when something needs it
+            data = next_buffer()
+            frame = decode_analysis(data, analysis_width, full_width)
+            evidence = lambda: cv2.imdecode(data, cv2.IMREAD_COLOR)
+            display = evidence() if sentinel.app_settings.get("stream_full_resolution") else frame
+        else:
+            frame = display = next_frame()
+            evidence = None
+        status, color, ear, mar, fatigue, gaze, alert, event = real.analyze_frame(frame, evidence=evidence)
+        out = real.draw_hud(display, status, color, ear, mar, fatigue, gaze)
+        sentinel.record_metrics(status, ear, mar, fatigue, gaze, alert, event)
+        sentinel.encode_frame_b64(out)
+
+    reset_metrics()
+    stages["capture_decode"] = lambda: decode_analysis(jpeg, analysis_width, full_width)
+    stages["face_mesh"] = lambda: real.facemesh.process(next_rgb())
+    stages["features"] = features
+    stages["state_machine"] = state_machine
+    stages["hud"] = hud
+    stages["encode"] = lambda: sentinel.encode_frame_b64(hud_frame)
+    stages["metrics"] = metrics
+    stages["end_to_end"] = end_to_end
+    # The state machine replays at least one full fixture cycle so every
+    # scripted alert is part of the measurement
+    min_iterations = {"state_machine": len(landmarks)}
+    return stages, reset_metrics, min_iterations, {"state_machine": alerts}
+
+
+def run_benchmarks(stages=STAGES, iterations=200, warmup=20, width=1280, height=720,
+                   video=None, landmarks_path=None, capture_mode="low_latency"):
+    frames = load_frames(video, width, height)
+    landmarks = load_landmarks(landmarks_path) if landmarks_path else synthetic_landmarks()
+    results = {}
+    with tempfile.TemporaryDirectory() as ss_dir:
+        fns, reset_metrics, min_iterations, alerts = build_stages(frames, landmarks, ss_dir, capture_mode)
+        for name in stages:
+            reset_metrics()
+            print(f"⏱️ {name}...", end=" ", flush=True)
+            results[name] = time_stage(fns[name], max(iterations, min_iterations.get(name, 0)), warmup)
+            if name in alerts:
+                # Alerts fired during warmup and timing, as a check on coverage
+                results[name]["alerts"] = dict(alerts[name])
+            print(f"{results[name]['median_ms']} ms")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "opencv_threads": cv2.getNumThreads(),
+            "numpy": np.__version__,
+            "resolution": [width, height],
+            "capture_mode": capture_mode,
+            "video": video,
+            "landmarks": landmarks_path or "synthetic",
+            "iterations": iterations,
+            "warmup": warmup,
+        },
+        "stages": results,
+    }
+
+
+# ====== REPORTING ======
+def compare(current, baseline, tolerance=10.0):
+    """Return (rows, regressed) comparing median times stage by stage."""
+    rows, regressed = [], False
+    for name, cur in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            rows.append((name, None, cur["median_ms"], None, "new"))
+            continue
+        delta = (cur["median_ms"] - base["median_ms"]) / base["median_ms"] * 100 if base["median_ms"] else 0.0
+        status = "ok"
+        if delta > tolerance:
+            status, regressed = "REGRESSION", True
+        elif delta < -tolerance:
+            status = "faster"
+        rows.append((name, base["median_ms"], cur["median_ms"], round(delta, 1), status))
+    return rows, regressed
+
+
+def print_results(report):
+    print(f"\n📊 {report['meta']['resolution'][0]}x{report['meta']['resolution'][1]}, "
+          f"{report['meta'].get('capture_mode', 'standard')} capture, {report['meta']['iterations']} iterations")
+    print(f"{'stage':<16}{'median':>10}{'p95':>10}{'mean':>10}{'cpu':>10}  (ms)")
+    for name, r in report["stages"].items():
+        print(f"{name:<16}{r['median_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['mean_ms']:>10.3f}{r['cpu_ms']:>10.3f}")
+
+
+def print_comparison(rows, tolerance):
+    print(f"\n🔍 Against baseline (tolerance ±{tolerance}%)")
+    print(f"{'stage':<16}{'baseline':>10}{'current':>10}{'delta':>9}  status")
+    for name, base, cur, delta, status in rows:
+        base_s = "--" if base is None else f"{base:.3f}"
+        delta_s = "--" if delta is None else f"{delta:+.1f}%"
+        print(f"{name:<16}{base_s:>10}{cur:>10.3f}{delta_s:>9}  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SentinelDrive detection hot path")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--video", help="take frames from this video instead of synthetic ones")
+    parser.add_argument("--landmarks", help="landmark fixture JSON (see --record)")
+    parser.add_argument("--capture-mode", choices=("low_latency", "standard"),
+                        help="path timed by end_to_end (default: the app's capture_mode setting)")
+    parser.add_argument("--record", metavar="VIDEO", help="record a landmark fixture from VIDEO to --landmarks and exit")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved results JSON")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="allowed median slowdown in percent")
+    parser.add_argument("--budget-ms", type=float, help="fail if end_to_end CPU time per frame exceeds this")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        if not args.landmarks:
+            parser.error("--record needs --landmarks to name the output fixture")
+        record_landmarks(args.record, args.landmarks)
+        return 0
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    if args.capture_mode is None:
+        import app as sentinel
+        args.capture_mode = sentinel.app_settings.get("capture_mode", "low_latency")
+
+    report = run_benchmarks(stages, args.iterations, args.warmup, args.width, args.height,
+                            args.video, args.landmarks, args.capture_mode)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    failed = False
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressed = compare(report, baseline, args.tolerance)
+        print_comparison(rows, args.tolerance)
+        failed |= regressed
+
+    if args.budget_ms is not None:
+        e2e = report["stages"].get("end_to_end")
+        if e2e is None:
+            parser.error("--budget-ms needs the end_to_end stage")
+        within = e2e["cpu_ms"] <= args.budget_ms
+        print(f"\n{'✅' if within else '❌'} end_to_end CPU {e2e['cpu_ms']:.2f} ms/frame "
+              f"(budget {args.budget_ms:.2f} ms)")
+        failed |= not within
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
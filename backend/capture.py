@@ -0,0 +1,168 @@
+"""Low-latency camera capture.
+
+CameraCapture negotiates the camera pixel format and keeps the driver
+buffer at one frame. A background thread grabs and retrieves continuously
+and hands only the newest buffer to read(), so a slow consumer skips stale
+frames instead of queueing behind them. The camera is never touched while
+the handoff lock is held, so read() returns as soon as a frame is ready.
+
+read() returns a reduced-resolution analysis frame. With MJPG the retrieved
+buffer is the raw JPEG, which is cheap to copy, and only frames that are
+actually read get decoded, at reduced scale by libjpeg; the full-resolution
+frame is decoded only when full_frame() is called, e.g. for a screenshot.
+Other formats are converted to BGR by the driver on every retrieve.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+CAPTURE_FORMATS = ("MJPG", "YUYV")
+
+# cv2.imdecode flags that let libjpeg scale during decode
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def fourcc_to_str(value):
+    value = int(value)
+    return "".join(chr((value >> 8 * i) & 0xFF) for i in range(4)).strip("\x00")
+
+
+def is_encoded(data):
+    # Raw MJPG buffers come back as a single row (or flat run) of bytes
+    return data is not None and data.dtype == np.uint8 and (data.ndim == 1 or data.shape[0] == 1)
+
+
+def decode_analysis(data, analysis_width, full_width=None):
+    """Decode (or downscale) a retrieved buffer to the analysis resolution."""
+    if is_encoded(data):
+        scale = (full_width or 0) // analysis_width if analysis_width else 1
+        flag = cv2.IMREAD_COLOR
+        for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+            if scale >= factor:
+                flag = reduced_flag
+                break
+        frame = cv2.imdecode(data, flag)
+    else:
+        frame = data
+    if frame is not None and analysis_width and frame.shape[1] > analysis_width:
+        h = int(frame.shape[0] * analysis_width / frame.shape[1])
+        frame = cv2.resize(frame, (analysis_width, h), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+class CameraCapture:
+    """Drop-in for cv2.VideoCapture in detection_loop and run_calibration."""
+
+    def __init__(self, index=0, width=1280, height=720, fps=30, formats=CAPTURE_FORMATS,
+                 buffer_size=1, analysis_width=640):
+        self.analysis_width = analysis_width
+        self.cap = cv2.VideoCapture(index)
+        self.negotiated = {}
+        # cap_lock serialises access to the camera; cond only guards the
+        # handoff of the newest buffer between the grab thread and read()
+        self.cap_lock = threading.Lock()
+        self.cond = threading.Condition()
+        self.running = False
+        self.grab_seq = 0
+        self.read_seq = 0
+        self.grab_time = None
+        self.frame_time = None
+        self.frames_dropped = 0
+        self._latest = None
+        self._last_data = None
+        self._full_frame = None
+        if self.cap.isOpened():
+            self._negotiate(width, height, fps, formats, buffer_size)
+            self.running = True
+            self.grabber = threading.Thread(target=self._grab_loop, daemon=True)
+            self.grabber.start()
+
+    def _negotiate(self, width, height, fps, formats, buffer_size):
+        fourcc = None
+        for fmt in formats:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fmt))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            fourcc = fourcc_to_str(self.cap.get(cv2.CAP_PROP_FOURCC))
+            if fourcc == fmt:
+                break
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+        # Not every backend honours this; the grab thread drains the queue anyway
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        # Ask for undecoded MJPG buffers; read() checks what actually arrives
+        raw = fourcc == "MJPG" and self.cap.set(cv2.CAP_PROP_FORMAT, -1)
+        self.negotiated = {
+            "fourcc": fourcc,
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": self.cap.get(cv2.CAP_PROP_FPS),
+            "buffer_size": int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+            "raw_requested": bool(raw),
+            "analysis_width": self.analysis_width,
+        }
+        print(f"📷 Camera negotiated: {self.negotiated}")
+
+    def _grab_loop(self):
+        while self.running:
+            with self.cap_lock:
+                ok = self.cap.grab()
+                ret, data = self.cap.retrieve() if ok else (False, None)
+            if not ret:
+                time.sleep(0.005)
+                continue
+            with self.cond:
+                self._latest = data
+                self.grab_seq += 1
+                self.grab_time = time.time()
+                self.cond.notify_all()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, prop, value):
+        with self.cap_lock:
+            return self.cap.set(prop, value)
+
+    def get(self, prop):
+        with self.cap_lock:
+            return self.cap.get(prop)
+
+    def read(self, timeout=1.0):
+        if not self.running:
+            return False, None
+        with self.cond:
+            fresh = self.cond.wait_for(lambda: self.grab_seq > self.read_seq or not self.running, timeout)
+            if not fresh or not self.running:
+                return False, None
+            data = self._latest
+            self.frames_dropped += self.grab_seq - self.read_seq - 1
+            self.read_seq = self.grab_seq
+            self.frame_time = self.grab_time
+        self._last_data = data
+        self._full_frame = None if is_encoded(data) else data
+        frame = decode_analysis(data, self.analysis_width, self.negotiated.get("width"))
+        return frame is not None, frame
+
+    def full_frame(self):
+        """Full-resolution BGR frame for the last read(), decoded on demand."""
+        if self._full_frame is None and self._last_data is not None:
+            self._full_frame = cv2.imdecode(self._last_data, cv2.IMREAD_COLOR)
+        return self._full_frame
+
+    def stats(self):
+        return dict(self.negotiated, frames_grabbed=self.grab_seq, frames_dropped=self.frames_dropped)
+
+    def release(self):
+        if self.running:
+            self.running = False
+            with self.cond:
+                self.cond.notify_all()
+            self.grabber.join(1.0)
+        with self.cap_lock:
+            self.cap.release()
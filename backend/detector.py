@@ -44,6 +44,7 @@ class DrowsinessDetector:
         self.ss_dir = "static/screenshots_log"
         os.makedirs(self.ss_dir, exist_ok=True)
         self.last_ss_time = 0
+        self.last_screenshot = None
         self.ss_cooldown = 5.0
         self.alarm_playing = False
         self.last_distraction_alert_time = 0
@@ -114,15 +115,23 @@ class DrowsinessDetector:
         now = time.time()
         if now - self.last_ss_time < self.ss_cooldown:
             return
+        if callable(frame):
+            # Full-resolution evidence is only decoded once a screenshot is due
+            frame = frame()
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         fn = os.path.join(self.ss_dir, f"{event_name}_{ts}.jpg")
         try:
             cv2.imwrite(fn, frame)
+            self.last_screenshot = fn
         except Exception as e:
             print(f"Screenshot failed: {e}")
         self.last_ss_time = now
+        return self.last_screenshot
 
-    def analyze_frame(self, frame):
+    def analyze_frame(self, frame, evidence=None):
+        self.last_screenshot = None
+        if evidence is None:
+            evidence = frame
         if time.time() - self.last_decay > 2.0 and self.fatigue_level > 0:
             self.fatigue_level -= 1
             self.last_decay = time.time()
@@ -145,7 +154,7 @@ class DrowsinessDetector:
                     self.distraction_active = True
                     current_time = time.time()
                     if current_time - self.last_distraction_alert_time > self.distraction_alert_cooldown:
-                        self.take_screenshot(frame, "distraction_alert")
+                        self.take_screenshot(evidence, "distraction_alert")
                         self.last_distraction_alert_time = current_time
                         status, color = "ALERT! LOOK AT ROAD!", (0, 0, 255)
                         distraction_alert_triggered = True
@@ -166,7 +175,7 @@ class DrowsinessDetector:
                         self.eye_closed_start = time.time()
                     elif time.time() - self.eye_closed_start > self.closed_eye_duration:
                         self.fatigue_level = min(self.fatigue_level + 3, 10)
-                        self.take_screenshot(frame, "eye_closure_detected")
+                        self.take_screenshot(evidence, "eye_closure_detected")
                         self.eye_closed_start = None
                         return "EYES CLOSED! WAKE UP!", (0, 0, 255), ear, mar, self.fatigue_level, gaze_ratio, True, "eyes_closed"
                 else:
@@ -182,7 +191,7 @@ class DrowsinessDetector:
                     self.yawn_start = None
                 if self.fatigue_level >= self.alert_lvl:
                     status, color = "ALERT! DROWSY!", (0, 0, 255)
-                    self.take_screenshot(frame, "fatigue_alert")
+                    self.take_screenshot(evidence, "fatigue_alert")
                     return status, color, ear, mar, self.fatigue_level, gaze_ratio, True, "fatigue_alert"
                 elif self.fatigue_level >= self.warning_lvl:
                     status, color = "WARNING: Drowsy", (0, 255, 255)
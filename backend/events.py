@@ -0,0 +1,314 @@
+"""In-process alert event bus.
+
+The detection thread publishes AlertEvents without blocking; every sink gets
+its own bounded queue and dispatcher thread that delivers events in batches,
+so a slow or failing consumer never stalls frame processing or other sinks.
+"""
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from datetime import datetime
+
+EVENT_TYPES = ("eyes_closed", "yawn", "distraction", "fatigue_alert")
+
+# What to do when a sink's queue is full
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class AlertEvent:
+    _seq = itertools.count(1)
+
+    def __init__(self, event_type, fatigue, metrics=None, screenshot=None,
+                 session_id=None, driver_id=None):
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event_type}")
+        self.seq = next(AlertEvent._seq)
+        self.type = event_type
+        self.timestamp = datetime.now().isoformat()
+        self.fatigue = fatigue
+        self.metrics = metrics or {}
+        self.screenshot = screenshot
+        self.session_id = session_id
+        self.driver_id = driver_id
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "type": self.type,
+            "timestamp": self.timestamp,
+            "fatigue": self.fatigue,
+            "metrics": self.metrics,
+            "screenshot": self.screenshot,
+            "session_id": self.session_id,
+            "driver_id": self.driver_id,
+        }
+
+
+# ====== SINKS ======
+class NDJSONSink:
+    """Appends events to a newline-delimited JSON log, rotating by size.
+
+    Files stay within max_bytes unless a single line is larger. Writes are
+    locked, so one instance can be shared by buses that overlap in time.
+    """
+
+    name = "ndjson"
+
+    def __init__(self, path="data/events.ndjson", max_bytes=5 * 1024 * 1024, backup_count=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write_batch(self, events):
+        lines = [(json.dumps(e.to_dict(), default=str) + "\n").encode("utf-8") for e in events]
+        with self.lock:
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            chunk = []
+            for line in lines:
+                if size > 0 and size + len(line) > self.max_bytes:
+                    self._append(chunk)
+                    self.rotate()
+                    chunk, size = [], 0
+                chunk.append(line)
+                size += len(line)
+            self._append(chunk)
+
+    def _append(self, chunk):
+        if chunk:
+            with open(self.path, "ab") as f:
+                f.write(b"".join(chunk))
+
+    def rotate(self):
+        if not os.path.exists(self.path):
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class WebhookSink:
+    """POSTs each batch as {"events": [...]} to an HTTP endpoint."""
+
+    name = "webhook"
+
+    def __init__(self, url, timeout=5.0, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        self.headers.update(headers or {})
+
+    def write_batch(self, events):
+        body = json.dumps({"events": [e.to_dict() for e in events]}, default=str).encode()
+        req = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        # urlopen raises HTTPError for non-2xx, which triggers a retry
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class DashboardSink:
+    """Keeps the most recent events in memory for /api/events polling."""
+
+    name = "dashboard"
+
+    def __init__(self, maxlen=200):
+        self.events = deque(maxlen=maxlen)
+        self.lock = threading.Lock()
+
+    def write_batch(self, events):
+        with self.lock:
+            self.events.extend(e.to_dict() for e in events)
+
+    def since(self, seq=0):
+        with self.lock:
+            return [e for e in self.events if e["seq"] > seq]
+
+    def latest_seq(self):
+        with self.lock:
+            return self.events[-1]["seq"] if self.events else 0
+
+
+# ====== DISPATCH ======
+class SinkDispatcher:
+    """Background thread that drains one sink's queue in batches.
+
+    Failed batches are retried with exponential backoff up to max_retries,
+    then dropped. While a batch is retrying, new events keep queueing up to
+    max_queue and the overflow policy decides which ones are discarded.
+    On stop, the remaining batches get a single attempt each until the stop
+    deadline passes; whatever is still queued then is dropped.
+    """
+
+    def __init__(self, sink, max_queue=1000, overflow=DROP_OLDEST, batch_size=50,
+                 flush_interval=1.0, max_retries=3, retry_backoff=0.5):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # Each counter has a single writer: "dropped" is bumped by the publishing
+        # thread on overflow, the rest by the dispatcher thread
+        self.stats = {"delivered": 0, "dropped": 0, "failed_batches": 0,
+                      "failed_events": 0, "retries": 0}
+        self.stop_event = threading.Event()
+        self.deadline = None
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       name=f"events-{getattr(sink, 'name', 'sink')}")
+
+    def start(self):
+        self.thread.start()
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+            return
+        except queue.Full:
+            pass
+        if self.overflow == DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                pass
+        self.stats["dropped"] += 1
+
+    def _collect_batch(self):
+        batch = []
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch):
+        attempt = 0
+        while True:
+            try:
+                self.sink.write_batch(batch)
+                self.stats["delivered"] += len(batch)
+                return
+            except Exception as e:
+                # No retries once stopping, so a dead endpoint can't hold
+                # the shutdown flush for the whole backoff schedule
+                if attempt == self.max_retries or self.stop_event.is_set():
+                    self._fail(batch, e)
+                    return
+                self.stats["retries"] += 1
+                self.stop_event.wait(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+
+    def _fail(self, events, reason):
+        self.stats["failed_batches"] += 1
+        self.stats["failed_events"] += len(events)
+        print(f"Event sink '{getattr(self.sink, 'name', 'sink')}' dropped "
+              f"{len(events)} events: {reason}")
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._deliver(batch)
+        # Flush whatever is left on shutdown, until the deadline
+        batch = self._drain()
+        while batch:
+            if self.deadline is not None and time.time() >= self.deadline:
+                left = batch + [self.queue.get_nowait() for _ in range(self.queue.qsize())]
+                self._fail(left, "stop deadline passed")
+                return
+            self._deliver(batch)
+            batch = self._drain()
+
+    def stop(self, timeout=5.0):
+        self.deadline = time.time() + timeout
+        self.stop_event.set()
+        self.thread.join(timeout)
+
+
+class EventBus:
+    def __init__(self):
+        self.dispatchers = []
+        self.published = 0
+        self.closed = False
+        # Orders publish() against stop() so nothing is queued after the
+        # dispatchers' final drain
+        self.lock = threading.Lock()
+
+    def add_sink(self, sink, **policy):
+        dispatcher = SinkDispatcher(sink, **policy)
+        self.dispatchers.append(dispatcher)
+        return dispatcher
+
+    def start(self):
+        for d in self.dispatchers:
+            d.start()
+        return self
+
+    def publish(self, event):
+        """Fan the event out to every sink without blocking the caller.
+
+        Returns False once the bus is stopped.
+        """
+        with self.lock:
+            if self.closed:
+                return False
+            self.published += 1
+            for d in self.dispatchers:
+                d.offer(event)
+            return True
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "sinks": {getattr(d.sink, "name", str(i)): dict(d.stats, queued=d.queue.qsize())
+                      for i, d in enumerate(self.dispatchers)},
+        }
+
+    def stop(self, timeout=5.0):
+        """Stop accepting events and flush every sink in parallel.
+
+        Waits at most `timeout` seconds in total. A dispatcher still in a
+        write at the deadline finishes that batch in the background, then
+        drops the rest of its queue.
+        """
+        with self.lock:
+            self.closed = True
+        deadline = time.time() + timeout
+        for d in self.dispatchers:
+            d.deadline = deadline
+            d.stop_event.set()
+        for d in self.dispatchers:
+            if d.thread.is_alive():
+                d.thread.join(max(0.0, deadline - time.time()))
@@ -0,0 +1,455 @@
+"""Load-testing harness for the SentinelDrive HTTP API.
+
+Starts the Flask app in-process against a synthetic or file-backed frame
+source and simulates many dashboard screens polling the API the way the
+browser pages do. Reports request throughput, per-endpoint latency
+percentiles, and detector FPS and per-frame processing time before and
+under load.
+
+    python -m backend.loadtest --clients 16 --duration 30
+    python -m backend.loadtest --source drive.mp4 --pages detection,analytics
+    python -m backend.loadtest --url http://cab-01:5000 --clients 8
+
+Sources are paced at the camera rate by default, which caps detector FPS;
+per-frame processing time shows the remaining headroom, and --fps 0 runs
+the source unpaced. Synthetic frames contain no detectable face, so only
+the cheap no-face path runs and detector load is understated; use
+--source with a recording of a driver for realistic numbers.
+
+The simulated clients run in a separate worker process, so their polling
+threads do not compete with the server and detection loop for the GIL.
+They still share the machine's CPU cores; on a small host that contention
+shows up in the loaded numbers.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+# (endpoint, interval in seconds) polled by each dashboard page, mirroring
+# the setInterval calls in static/js/detection-ui.js and the page templates.
+# performance.js is loaded by base.html on every page and adds its own
+# /api/metrics latency check every 2 s.
+PAGE_PROFILES = {
+    "detection": [("/api/frame-b64", 0.15), ("/api/metrics", 0.35), ("/api/events", 1.0)],
+    "analytics": [("/api/metrics-history", 1.0)],
+    "logs": [("/api/sessions", 5.0)],
+    "gallery": [("/api/screenshots", 10.0)],
+}
+for _polls in PAGE_PROFILES.values():
+    _polls.append(("/api/metrics", 2.0))
+
+
+# ====== FRAME SOURCES ======
+class PacedSource:
+    """Base for frame sources: paces read() and times the detection loop.
+
+    The time between one read() returning and the next read() starting is
+    what detection_loop spent processing that frame.
+    """
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps else None
+        self.next_frame_time = time.time()
+        self.last_return = None
+        self.processing_times = []
+
+    def read(self):
+        now = time.perf_counter()
+        if self.last_return is not None:
+            self.processing_times.append(now - self.last_return)
+        if self.interval:
+            delay = self.next_frame_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame_time = max(self.next_frame_time + self.interval, time.time())
+        ret, frame = self.next_frame()
+        self.last_return = time.perf_counter()
+        return ret, frame
+
+    def next_frame(self):
+        raise NotImplementedError
+
+
+class SyntheticCapture(PacedSource):
+    """Camera stand-in that serves generated frames (fps=0: unpaced)."""
+
+    def __init__(self, width=1280, height=720, fps=30, pool_size=30):
+        super().__init__(fps)
+        self.width = width
+        self.height = height
+        self.frames = self._make_frames(pool_size)
+        self.index = 0
+        self.opened = True
+
+    def _make_frames(self, count):
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 64, (self.height, self.width, 3), dtype=np.uint8)
+        frames = []
+        for i in range(count):
+            frame = base.copy()
+            cx = int(self.width / 2 + self.width / 8 * np.sin(2 * np.pi * i / count))
+            cy = self.height // 2
+            cv2.ellipse(frame, (cx, cy), (self.width // 8, self.height // 4), 0, 0, 360, (140, 170, 200), -1)
+            cv2.circle(frame, (cx - self.width // 24, cy - self.height // 16), 12, (40, 40, 40), -1)
+            cv2.circle(frame, (cx + self.width // 24, cy - self.height // 16), 12, (40, 40, 40), -1)
+            frames.append(frame)
+        return frames
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        return False
+
+    def next_frame(self):
+        if not self.opened:
+            return False, None
+        frame = self.frames[self.index].copy()
+        self.index = (self.index + 1) % len(self.frames)
+        return True, frame
+
+    def release(self):
+        self.opened = False
+
+
+class FileCapture(PacedSource):
+    """Loops a recorded video file, paced at the file's frame rate by default."""
+
+    def __init__(self, path, fps=None):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open video file: {path}")
+        if fps is None:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        super().__init__(fps)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def next_frame(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+# ====== IN-PROCESS SERVER ======
+class AppUnderTest:
+    """Runs app.py's detection loop and a threaded WSGI server in-process."""
+
+    def __init__(self, source, host="127.0.0.1", port=0):
+        self.source = source
+        self.host = host
+        self.port = port
+        self.server = None
+        self.module = None
+
+    def start(self):
+        from werkzeug.serving import make_server
+        import app as sentinel
+        from backend.detector import DrowsinessDetector
+
+        self.module = sentinel
+        # Skip start_detection(): its calibration opens a preview window and
+        # it would grab the real webcam. Wire the globals up directly instead.
+        sentinel.detector = DrowsinessDetector()
+        sentinel.cap = self.source
+        sentinel.metrics_history = []
+        sentinel.alert_count = 0
+        sentinel.current_session = {
+            "id": "loadtest_" + time.strftime("%Y%m%d_%H%M%S"),
+            "alerts": 0,
+            "total_fatigue": 0,
+            "frames_count": 0,
+            "peak_fatigue": 0,
+        }
+        sentinel.is_running = True
+        threading.Thread(target=sentinel.detection_loop, daemon=True).start()
+
+        # Per-request access logs would swamp the report and cost server time
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        self.server = make_server(self.host, self.port, sentinel.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{self.host}:{self.server.server_port}"
+
+    def frames_processed(self):
+        return self.module.current_session["frames_count"]
+
+    def processing_times(self):
+        return getattr(self.source, "processing_times", [])
+
+    def stop(self):
+        self.module.is_running = False
+        if self.server:
+            self.server.shutdown()
+        self.source.release()
+
+
+# ====== CLIENTS ======
+class EndpointStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+
+    def record(self, latency, size, ok):
+        with self.lock:
+            self.latencies.append(latency)
+            self.bytes += size
+            if not ok:
+                self.errors += 1
+
+
+def poll_endpoint(base_url, path, interval, stats, stop_event, timeout):
+    """Poll one endpoint at a fixed rate until stop_event is set.
+
+    One request is in flight per poller; when a response takes longer than
+    the interval the next poll starts immediately instead of piling up.
+    """
+    next_time = time.time()
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        size, ok = 0, True
+        try:
+            with urllib.request.urlopen(base_url + path, timeout=timeout) as resp:
+                size = len(resp.read())
+        except urllib.error.HTTPError as e:
+            # 404 from /api/frame-b64 before the first frame is a valid reply
+            ok = e.code < 500
+            size = len(e.read())
+        except Exception:
+            ok = False
+        stats.record(time.perf_counter() - start, size, ok)
+        next_time = max(next_time + interval, time.time())
+        stop_event.wait(next_time - time.time())
+
+
+def run_clients(url, polls, duration, timeout):
+    """Poll (path, interval) pairs for `duration` seconds, one thread each.
+
+    Runs in the client worker process and returns plain data so the
+    samples can be pickled back: (elapsed, {path: (latencies, errors, bytes)}).
+    """
+    stats = {}
+    stop_event = threading.Event()
+    threads = []
+    for path, interval in polls:
+        s = stats.setdefault(path, EndpointStats())
+        threads.append(threading.Thread(
+            target=poll_endpoint,
+            args=(url, path, interval, s, stop_event, timeout),
+            daemon=True,
+        ))
+    start = time.time()
+    for t in threads:
+        t.start()
+    stop_event.wait(duration)
+    stop_event.set()
+    for t in threads:
+        t.join(timeout + 1)
+    elapsed = time.time() - start
+    return elapsed, {path: (s.latencies, s.errors, s.bytes) for path, s in stats.items()}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(stats, elapsed):
+    endpoints = {}
+    total_requests = 0
+    for path, s in sorted(stats.items()):
+        lat = sorted(s.latencies)
+        total_requests += len(lat)
+        endpoints[path] = {
+            "requests": len(lat),
+            "errors": s.errors,
+            "rps": round(len(lat) / elapsed, 2),
+            "kb_per_s": round(s.bytes / 1024 / elapsed, 1),
+            "p50_ms": _ms(percentile(lat, 50)),
+            "p90_ms": _ms(percentile(lat, 90)),
+            "p99_ms": _ms(percentile(lat, 99)),
+            "max_ms": _ms(lat[-1] if lat else None),
+        }
+    return {
+        "total_requests": total_requests,
+        "total_rps": round(total_requests / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+# ====== RUNNER ======
+def measure_detector(target, seconds):
+    """Detector FPS and per-frame processing time over the next `seconds`."""
+    start_frames, start = target.frames_processed(), time.time()
+    start_index = len(target.processing_times())
+    time.sleep(seconds)
+    elapsed = time.time() - start
+    fps = (target.frames_processed() - start_frames) / elapsed if elapsed > 0 else 0.0
+    times = sorted(target.processing_times()[start_index:])
+    return {
+        "fps": round(fps, 2),
+        "frame_ms_mean": _ms(sum(times) / len(times)) if times else None,
+        "frame_ms_p50": _ms(percentile(times, 50)),
+        "frame_ms_p95": _ms(percentile(times, 95)),
+    }
+
+
+def _change_pct(before, after):
+    if not before or after is None:
+        return None
+    return round((after / before - 1) * 100, 1)
+
+
+def run_load_test(clients=8, pages=None, duration=30.0, baseline=5.0,
+                  source=None, url=None, timeout=10.0):
+    pages = pages or list(PAGE_PROFILES)
+    target = None
+    if url is None:
+        target = AppUnderTest(source or SyntheticCapture())
+        url = target.start()
+        print(f"🚀 App under test on {url}")
+
+    try:
+        idle = None
+        if target:
+            print(f"⏱️ Measuring idle detector for {baseline:.0f}s...")
+            idle = measure_detector(target, baseline)
+
+        polls = []
+        for i in range(clients):
+            polls.extend(PAGE_PROFILES[pages[i % len(pages)]])
+
+        # Spawn (not fork) the client process: the server and detection
+        # threads are already running here
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # Start the worker and import this module before the clock starts
+            pool.submit(percentile, [], 50).result()
+            print(f"📡 {clients} clients over pages {', '.join(pages)} for {duration:.0f}s...")
+            future = pool.submit(run_clients, url, polls, duration, timeout)
+            loaded = None
+            if target:
+                loaded = measure_detector(target, duration)
+            elapsed, samples = future.result()
+    finally:
+        if target:
+            target.stop()
+
+    report = {
+        "clients": clients,
+        "pages": pages,
+        "duration_s": round(elapsed, 2),
+        "detector": {
+            "idle": idle,
+            "loaded": loaded,
+            "fps_change_pct": _change_pct(idle and idle["fps"], loaded and loaded["fps"]),
+            "frame_ms_change_pct": _change_pct(idle and idle["frame_ms_p50"],
+                                               loaded and loaded["frame_ms_p50"]),
+        },
+    }
+    stats = {}
+    for path, (latencies, errors, size) in samples.items():
+        s = stats[path] = EndpointStats()
+        s.latencies, s.errors, s.bytes = latencies, errors, size
+    report.update(summarize(stats, elapsed))
+    return report
+
+
+def print_report(report):
+    print(f"\n📊 {report['clients']} clients, {report['duration_s']}s, "
+          f"{report['total_requests']} requests ({report['total_rps']} req/s)")
+    print(f"{'endpoint':<24}{'req/s':>8}{'err':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    for path, e in report["endpoints"].items():
+        print(f"{path:<24}{e['rps']:>8}{e['errors']:>6}{_fmt(e['p50_ms'])}"
+              f"{_fmt(e['p90_ms'])}{_fmt(e['p99_ms'])}{_fmt(e['max_ms'])}")
+    det = report["detector"]
+    if det["idle"] is not None:
+        idle, loaded = det["idle"], det["loaded"]
+        print(f"\n🎥 Detector FPS: idle {idle['fps']} → loaded {loaded['fps']} ({_pct(det['fps_change_pct'])})")
+        print(f"   Frame time p50: idle {_val(idle['frame_ms_p50'])} ms → loaded {_val(loaded['frame_ms_p50'])} ms "
+              f"({_pct(det['frame_ms_change_pct'])}), "
+              f"p95 {_val(idle['frame_ms_p95'])} → {_val(loaded['frame_ms_p95'])} ms")
+
+
+def _val(value):
+    return "--" if value is None else value
+
+
+def _fmt(value):
+    return f"{_val(value):>9}"
+
+
+def _pct(value):
+    return "--" if value is None else f"{value:+}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the SentinelDrive HTTP API")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent dashboard screens")
+    parser.add_argument("--pages", default=",".join(PAGE_PROFILES),
+                        help="comma-separated pages assigned round-robin to clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="load phase length in seconds")
+    parser.add_argument("--baseline", type=float, default=5.0, help="idle FPS measurement in seconds")
+    parser.add_argument("--source", help="video file to loop instead of synthetic frames")
+    parser.add_argument("--fps", type=float,
+                        help="frame source rate, 0 for unpaced (default: file rate or 30)")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    pages = [p.strip() for p in args.pages.split(",") if p.strip()]
+    unknown = [p for p in pages if p not in PAGE_PROFILES]
+    if unknown:
+        parser.error(f"unknown page(s): {', '.join(unknown)}")
+
+    source = None
+    if args.url is None:
+        source = FileCapture(args.source, args.fps) if args.source else SyntheticCapture(fps=30 if args.fps is None else args.fps)
+
+    report = run_load_test(
+        clients=args.clients,
+        pages=pages,
+        duration=args.duration,
+        baseline=args.baseline,
+        source=source,
+        url=args.url,
+        timeout=args.timeout,
+    )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    print_report(report)
+    if args.json:
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
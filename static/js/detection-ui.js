@@ -3,6 +3,10 @@
 let detectionActive = false;
 let frameInterval = null;
 let metricsInterval = null;
+let eventsInterval = null;
+let lastEventSeq = 0;
+let lastSpoken = {};
+const VOICE_COOLDOWN_MS = 5000;
 let sessionStart = null;
 let alertCount = 0;
 
@@ -18,6 +22,9 @@ const detectionUI = {
         try {
             const response = await fetch('/api/start-detection', { method: 'POST' });
             if (response.ok) {
+                // Skip alerts from earlier sessions still held by the server
+                const data = await response.json();
+                lastEventSeq = data.event_seq ?? 0;
                 document.getElementById('startBtn').disabled = true;
                 document.getElementById('stopBtn').disabled = false;
                 document.getElementById('status').innerText = "⏳ Calibrating... (5 sec)";
@@ -28,6 +35,7 @@ const detectionUI = {
                     document.getElementById('status').innerText = "✅ Live Detection Active";
                     detectionUI.updateFrame();
                     detectionUI.updateMetrics();
+                    detectionUI.updateEvents();
                 }, 5000);
             }
         } catch (err) {
@@ -45,6 +53,7 @@ const detectionUI = {
                 detectionActive = false;
                 clearInterval(frameInterval);
                 clearInterval(metricsInterval);
+                clearInterval(eventsInterval);
             }
         } catch (err) {}
     },
@@ -80,6 +89,24 @@ const detectionUI = {
         }, 350);
     },
 
+    updateEvents: () => {
+        eventsInterval = setInterval(async () => {
+            if (!detectionActive) { clearInterval(eventsInterval); return; }
+            try {
+                const response = await fetch(`/api/events?since=${lastEventSeq}`);
+                const data = await response.json();
+                const now = Date.now();
+                for (const event of data.events) {
+                    lastEventSeq = Math.max(lastEventSeq, event.seq);
+                    // fatigue_alert repeats every frame while fatigue is high
+                    if (now - (lastSpoken[event.type] ?? 0) < VOICE_COOLDOWN_MS) continue;
+                    lastSpoken[event.type] = now;
+                    if (typeof voiceAlerts !== 'undefined') voiceAlerts.trigger(event.type);
+                }
+            } catch (err) {}
+        }, 1000);
+    },
+
     updateDashboardMetrics: (metrics) => {
         document.getElementById('metricEAR').textContent = metrics.ear ?? "--";
         document.getElementById('metricMAR').textContent = metrics.mar ?? "--";
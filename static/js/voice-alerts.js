@@ -20,6 +20,7 @@ const voiceAlerts = {
     },
     alerts: {
         drowsy: { text: "Alert! You are getting drowsy. Wake up immediately!", urgency: 'critical' },
+        fatigue_alert: { text: "Alert! You are getting drowsy. Wake up immediately!", urgency: 'critical' },
         eyes_closed: { text: "Eyes closed! Please wake up and stay alert!", urgency: 'critical' },
         yawn: { text: "Yawning detected. Stay focused!", urgency: 'normal' },
         distraction: { text: "Attention! Eyes off the road. Look ahead immediately!", urgency: 'critical' },
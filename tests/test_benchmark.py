@@ -0,0 +1,44 @@
+import json
+
+from backend.benchmark import compare, main
+
+
+def make_report(**medians):
+    return {"stages": {name: {"median_ms": ms} for name, ms in medians.items()}}
+
+
+# ====== COMPARE ======
+def test_compare_flags_slowdown_beyond_tolerance():
+    rows, regressed = compare(make_report(hud=1.2, encode=1.05), make_report(hud=1.0, encode=1.0), tolerance=10)
+    assert regressed
+    assert dict((r[0], r[4]) for r in rows) == {"hud": "REGRESSION", "encode": "ok"}
+    assert rows[0][3] == 20.0
+
+
+def test_compare_faster_and_new_stages_pass():
+    rows, regressed = compare(make_report(hud=0.5, end_to_end=9.0), make_report(hud=1.0), tolerance=10)
+    assert not regressed
+    assert rows == [("hud", 1.0, 0.5, -50.0, "faster"), ("end_to_end", None, 9.0, None, "new")]
+
+
+def test_compare_zero_baseline_is_not_a_regression():
+    _, regressed = compare(make_report(metrics=0.01), make_report(metrics=0.0))
+    assert not regressed
+
+
+# ====== EXIT CODES ======
+def run_main(*args):
+    return main(["--iterations", "3", "--warmup", "0", *args])
+
+
+def test_budget_exit_code():
+    assert run_main("--stages", "end_to_end", "--budget-ms", "100000") == 0
+    assert run_main("--stages", "end_to_end", "--budget-ms", "0.0001") == 1
+
+
+def test_compare_exit_code(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(make_report(metrics=1e6)))
+    assert run_main("--stages", "metrics", "--compare", str(baseline)) == 0
+    baseline.write_text(json.dumps(make_report(metrics=1e-9)))
+    assert run_main("--stages", "metrics", "--compare", str(baseline)) == 1
@@ -0,0 +1,112 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import backend.capture as capture
+from backend.capture import CameraCapture
+
+SOURCE_FPS = 30
+
+
+class FakeVideoCapture:
+    """Camera stand-in: grab() blocks until the next frame is due, like a
+    driver at SOURCE_FPS, and retrieve() returns raw MJPG bytes."""
+
+    def __init__(self, index):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        cv2.rectangle(frame, (400, 200), (880, 520), (0, 200, 255), -1)
+        self.jpeg = cv2.imencode(".jpg", frame)[1].reshape(1, -1)
+        self.props = {cv2.CAP_PROP_FRAME_WIDTH: 1280, cv2.CAP_PROP_FRAME_HEIGHT: 720,
+                      cv2.CAP_PROP_FPS: SOURCE_FPS, cv2.CAP_PROP_BUFFERSIZE: 1}
+        self.next_frame_time = time.time()
+        self.grabs = 0
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FOURCC:
+            value = cv2.VideoWriter_fourcc(*"MJPG")
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def grab(self):
+        delay = self.next_frame_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame_time += 1.0 / SOURCE_FPS
+        self.grabs += 1
+        return self.opened
+
+    def retrieve(self):
+        return True, self.jpeg.copy()
+
+    def release(self):
+        self.opened = False
+
+
+@pytest.fixture
+def camera(monkeypatch):
+    monkeypatch.setattr(capture.cv2, "VideoCapture", FakeVideoCapture)
+    cam = CameraCapture(0, analysis_width=640)
+    yield cam
+    cam.release()
+
+
+def read_for(cam, seconds, processing):
+    reads, waits = 0, []
+    end = time.time() + seconds
+    while time.time() < end:
+        start = time.perf_counter()
+        ret, frame = cam.read()
+        waits.append(time.perf_counter() - start)
+        assert ret
+        reads += 1
+        time.sleep(processing)
+    return reads, sorted(waits)[len(waits) // 2]
+
+
+# ====== THROUGHPUT ======
+def test_reads_keep_up_with_source(camera):
+    camera.read()
+    reads, median_wait = read_for(camera, 1.0, 0.0)
+    assert reads >= SOURCE_FPS * 0.85
+    # Waiting for the next frame, never for a grab to let go of a lock
+    assert median_wait < 1.5 / SOURCE_FPS
+    assert camera.stats()["frames_dropped"] <= 1
+
+
+def test_slow_consumer_drops_stale_frames(camera):
+    camera.read()
+    dropped_before = camera.frames_dropped
+    reads, _ = read_for(camera, 1.0, 0.05)
+    assert reads >= 15
+    dropped = camera.frames_dropped - dropped_before
+    # Every frame grabbed in the window was either read or dropped
+    assert abs(reads + dropped - SOURCE_FPS) <= 3
+    assert dropped > 0
+
+
+# ====== DECODE ======
+def test_read_returns_analysis_frame_and_decodes_full_frame_lazily(camera):
+    ret, frame = camera.read()
+    assert ret
+    assert frame.shape == (360, 640, 3)
+    assert camera._full_frame is None
+    full = camera.full_frame()
+    assert full.shape == (720, 1280, 3)
+    assert camera.full_frame() is full
+    camera.read()
+    assert camera._full_frame is None
+
+
+def test_release_stops_grab_thread(camera):
+    camera.release()
+    assert not camera.grabber.is_alive()
+    assert camera.read() == (False, None)
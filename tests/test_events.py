@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from backend.events import (
+    DROP_NEWEST, DROP_OLDEST, AlertEvent, DashboardSink, EventBus, NDJSONSink,
+    SinkDispatcher, WebhookSink,
+)
+
+
+def make_events(n):
+    return [AlertEvent("yawn", 3, {"ear": 0.2}, "x.jpg", "s1", "default") for _ in range(n)]
+
+
+class RecordingSink:
+    name = "recording"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def write_batch(self, events):
+        time.sleep(self.delay)
+        self.batches.append(list(events))
+
+    def delivered(self):
+        return [e for batch in self.batches for e in batch]
+
+
+@pytest.fixture
+def webhook():
+    """Local stand-in webhook that fails the first `fail` POSTs with 503."""
+    state = {"fail": 0, "received": [], "attempts": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            state["attempts"] += 1
+            if state["fail"] > 0:
+                state["fail"] -= 1
+                self.send_response(503)
+                self.end_headers()
+                return
+            state["received"].extend(json.loads(body)["events"])
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/hook"
+    yield state
+    server.shutdown()
+
+
+# ====== OVERFLOW ======
+def test_drop_oldest_keeps_newest_events():
+    d = SinkDispatcher(RecordingSink(), max_queue=3, overflow=DROP_OLDEST)
+    events = make_events(5)
+    for e in events:
+        d.offer(e)
+    assert d.stats["dropped"] == 2
+    assert [d.queue.get_nowait().seq for _ in range(3)] == [e.seq for e in events[2:]]
+
+
+def test_drop_newest_keeps_oldest_events():
+    d = SinkDispatcher(RecordingSink(), max_queue=3, overflow=DROP_NEWEST)
+    events = make_events(5)
+    for e in events:
+        d.offer(e)
+    assert d.stats["dropped"] == 2
+    assert [d.queue.get_nowait().seq for _ in range(3)] == [e.seq for e in events[:3]]
+
+
+def test_slow_sink_does_not_block_publish_or_other_sinks():
+    fast, slow = RecordingSink(), RecordingSink(delay=0.5)
+    slow.name = "slow"
+    bus = EventBus()
+    bus.add_sink(fast, flush_interval=0.05)
+    bus.add_sink(slow, max_queue=5, batch_size=5, flush_interval=0.05)
+    bus.start()
+    start = time.perf_counter()
+    for e in make_events(100):
+        bus.publish(e)
+    assert time.perf_counter() - start < 0.1
+    time.sleep(0.3)
+    assert len(fast.delivered()) == 100
+    stats = bus.stats()["sinks"]
+    assert stats["recording"]["dropped"] == 0
+    assert stats["slow"]["dropped"] > 0
+    bus.stop(timeout=2.0)
+
+
+# ====== RETRY ======
+def test_webhook_retries_then_delivers(webhook):
+    webhook["fail"] = 2
+    d = SinkDispatcher(WebhookSink(webhook["url"]), max_retries=3, retry_backoff=0.01)
+    events = make_events(4)
+    d._deliver(events)
+    assert webhook["attempts"] == 3
+    assert [e["seq"] for e in webhook["received"]] == [e.seq for e in events]
+    assert d.stats["retries"] == 2
+    assert d.stats["delivered"] == 4
+    assert d.stats["failed_batches"] == 0
+
+
+def test_webhook_gives_up_after_max_retries(webhook):
+    webhook["fail"] = 100
+    d = SinkDispatcher(WebhookSink(webhook["url"]), max_retries=2, retry_backoff=0.01)
+    d._deliver(make_events(3))
+    assert webhook["attempts"] == 3
+    assert webhook["received"] == []
+    assert d.stats["failed_batches"] == 1
+    assert d.stats["failed_events"] == 3
+    assert d.stats["delivered"] == 0
+
+
+# ====== SHUTDOWN ======
+def test_stop_flushes_queued_events():
+    sink = RecordingSink(delay=0.05)
+    bus = EventBus()
+    bus.add_sink(sink, batch_size=10, flush_interval=10.0)
+    bus.start()
+    for e in make_events(35):
+        bus.publish(e)
+    bus.stop(timeout=2.0)
+    assert len(sink.delivered()) == 35
+
+
+def test_publish_after_stop_is_rejected():
+    sink = RecordingSink()
+    bus = EventBus()
+    dispatcher = bus.add_sink(sink)
+    bus.start()
+    bus.stop(timeout=2.0)
+    assert bus.publish(make_events(1)[0]) is False
+    assert dispatcher.queue.qsize() == 0
+    assert bus.stats()["published"] == 0
+
+
+def test_stop_waits_for_one_overall_deadline():
+    bus = EventBus()
+    for _ in range(3):
+        bus.add_sink(RecordingSink(delay=1.0), flush_interval=0.01)
+    bus.start()
+    for e in make_events(1):
+        bus.publish(e)
+    time.sleep(0.05)
+    start = time.perf_counter()
+    bus.stop(timeout=0.3)
+    assert time.perf_counter() - start < 0.6
+
+
+def test_shutdown_flush_tries_each_batch_once(webhook):
+    webhook["fail"] = 100
+    d = SinkDispatcher(WebhookSink(webhook["url"]), batch_size=2, max_retries=5, retry_backoff=1.0)
+    for e in make_events(6):
+        d.offer(e)
+    d.deadline = time.time() + 5.0
+    d.stop_event.set()
+    start = time.perf_counter()
+    d._run()
+    assert time.perf_counter() - start < 1.0
+    assert webhook["attempts"] == 3
+    assert d.stats["retries"] == 0
+    assert d.stats["failed_events"] == 6
+
+
+def test_shutdown_flush_stops_at_deadline():
+    sink = RecordingSink(delay=0.2)
+    d = SinkDispatcher(sink, batch_size=1)
+    for e in make_events(5):
+        d.offer(e)
+    d.deadline = time.time() + 0.3
+    d.stop_event.set()
+    d._run()
+    assert 0 < len(sink.delivered()) < 5
+    assert d.stats["failed_events"] == 5 - len(sink.delivered())
+    assert d.queue.qsize() == 0
+
+
+# ====== SINKS ======
+def test_ndjson_rotation_respects_max_bytes(tmp_path):
+    path = tmp_path / "events.ndjson"
+    sink = NDJSONSink(str(path), max_bytes=2000, backup_count=2)
+    line_size = len(json.dumps(make_events(1)[0].to_dict()) + "\n")
+    for _ in range(3):
+        sink.write_batch(make_events(20))
+    files = sorted(os.listdir(tmp_path))
+    assert files == ["events.ndjson", "events.ndjson.1", "events.ndjson.2"]
+    for name in files:
+        size = os.path.getsize(tmp_path / name)
+        assert 0 < size <= 2000
+        assert size > 2000 - 2 * line_size or name == "events.ndjson"
+    for name in files:
+        with open(tmp_path / name) as f:
+            for line in f:
+                assert json.loads(line)["type"] == "yawn"
+
+
+def test_dashboard_sink_since_and_latest_seq():
+    sink = DashboardSink(maxlen=5)
+    assert sink.latest_seq() == 0
+    events = make_events(8)
+    sink.write_batch(events)
+    assert sink.latest_seq() == events[-1].seq
+    assert [e["seq"] for e in sink.since(events[5].seq)] == [e.seq for e in events[6:]]
+    assert len(sink.since(0)) == 5
+
+
+def test_unknown_event_type_rejected():
+    with pytest.raises(ValueError):
+        AlertEvent("sneeze", 1)